@@ -1,154 +1,387 @@
+import math
+import mmap
+import re
+import sqlite3
+from array import array
 from datetime import datetime
+from functools import lru_cache
 
-class Record:
+# Категории хранятся в базе как целые коды: сравнение целых чисел быстрее
+# сравнения строк, а индекс по ним компактнее
+CAT_ENC = {'Доход': 0, 'Расход': 1}
+CAT_DEC = ('Доход', 'Расход')
+
+# Предельная сумма в копейках - наибольшее целое, которое хранит SQLite
+MAX_KOPECKS = 2 ** 63 - 1
+
+def format_amount(kopecks):
     """
-    Класс Record представляет собой запись о доходе или расходе.
-    Содержит поля: date (дата), category (категория: Доход или Расход), amount (сумма) и description (описание).
+    Форматирует сумму в копейках для отображения в рублях, например 1500.00.
     """
-    def __init__(self, date, category, amount, description):
-        self.date = date
-        self.category = category
-        self.amount = amount
-        self.description = description
+    sign = '-' if kopecks < 0 else ''
+    kopecks = abs(kopecks)
+    return f'{sign}{kopecks // 100}.{kopecks % 100:02d}'
 
 class FinanceTracker:
     """
     Класс FinanceTracker управляет финансовыми записями.
-    Содержит методы для загрузки и сохранения данных, добавления, редактирования, удаления и поиска записей, а также показа баланса.
+    Хранит записи в базе данных SQLite и содержит методы для добавления, редактирования,
+    удаления и поиска записей, а также показа баланса.
     """
-    def __init__(self, data_file):
-        # data_file - путь к текстовому файлу для хранения записей
+    def __init__(self, data_file, legacy_file=None):
+        # data_file - путь к файлу базы данных SQLite
         self.data_file = data_file
-        # Инициализируем пустой список для хранения записей
-        self.records = []
-        # Загружаем данные из файла при инициализации
-        self.load_data()
+        # Открываем соединение с базой данных
+        self.conn = sqlite3.connect(self.data_file)
+        # Режим WAL дописывает изменения в конец журнала вместо перезаписи страниц базы,
+        # а synchronous=NORMAL убирает лишние сбросы на диск при каждой записи
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        # Создаем таблицу записей, если она еще не существует;
+        # сумма хранится в копейках как целое число
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS records('
+            'id INTEGER PRIMARY KEY, '
+            'date TEXT, category INTEGER, amount INTEGER, description TEXT)'
+        )
+        # Базы, созданные старыми версиями, хранят категорию строкой и/или
+        # сумму дробным числом рублей; такую таблицу нужно перестроить один раз
+        column_types = {
+            column[1]: column[2]
+            for column in self.conn.execute('PRAGMA table_info(records)')
+        }
+        if column_types['category'] == 'TEXT' or column_types['amount'] == 'REAL':
+            if column_types['category'] == 'TEXT':
+                category_expr = "CASE category WHEN 'Доход' THEN 0 ELSE 1 END"
+            else:
+                category_expr = 'category'
+            # Перестраиваем таблицу в одной явной транзакции: новая таблица
+            # собирается под временным именем и заменяет старую только последним
+            # шагом, поэтому при сбое посреди перестройки данные остаются в
+            # старой таблице, и перенос просто повторится при следующем запуске
+            self.conn.execute('BEGIN')
+            self.conn.execute('DROP TABLE IF EXISTS records_new')
+            self.conn.execute(
+                'CREATE TABLE records_new('
+                'id INTEGER PRIMARY KEY, '
+                'date TEXT, category INTEGER, amount INTEGER, description TEXT)'
+            )
+            self.conn.execute(
+                f'INSERT INTO records_new SELECT id, date, {category_expr}, '
+                'CAST(ROUND(amount * 100) AS INTEGER), description FROM records'
+            )
+            self.conn.execute('DROP TABLE records')
+            self.conn.execute('ALTER TABLE records_new RENAME TO records')
+            self.conn.commit()
+        # Индексы по категории и дате ускоряют поиск и подсчет баланса.
+        # Индекс категории включает и сумму, чтобы подсчет баланса читал
+        # только компактные страницы индекса, не обращаясь к самой таблице
+        self.conn.execute('DROP INDEX IF EXISTS idx_cat')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_cat_amount ON records(category, amount)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_date ON records(date)')
+        self.conn.commit()
+        # Один курсор переиспользуется всеми операциями, чтобы не создавать
+        # новый объект курсора при каждом обращении к базе
+        self._cursor = self.conn.cursor()
+        # Переносим записи из старого текстового файла, если он указан
+        if legacy_file:
+            self._import_legacy(legacy_file)
+        # Кэш общих сумм подсчитывается лениво при первом обращении, чтобы
+        # запуск ради одного добавления не сканировал существующие записи
+        self._income = None
+        self._expense = None
+
+    def _ensure_totals(self):
+        """
+        Подсчитывает кэшированные суммы дохода и расхода при первом обращении.
+        """
+        if self._income is None:
+            self._income, self._expense = self._load_totals()
+
+    def _load_totals(self):
+        """
+        Подсчитывает общий доход и общий расход одним запросом к базе данных.
+        """
+        totals = dict(self._cursor.execute(
+            'SELECT category, SUM(amount) FROM records GROUP BY category'
+        ))
+        return totals.get(CAT_ENC['Доход'], 0), totals.get(CAT_ENC['Расход'], 0)
 
-    def load_data(self):
+    def _import_legacy(self, legacy_file):
         """
-        Загружает данные из текстового файла и преобразует их в список записей.
+        Переносит записи из старого текстового файла в базу данных.
+        Выполняется только один раз: факт переноса отмечается в самой базе
+        (PRAGMA user_version), поэтому удаление всех записей при следующем
+        запуске не воскрешает данные из старого файла.
         """
+        # Пропускаем перенос, если он уже выполнялся
+        if self._cursor.execute('PRAGMA user_version').fetchone()[0]:
+            return
+        # База, заполненная до появления отметки, тоже считается перенесенной
+        count = self._cursor.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+        if count:
+            self.conn.execute('PRAGMA user_version = 1')
+            self.conn.commit()
+            return
+        # Записи накапливаются в параллельных списках полей вместо объектов с атрибутами;
+        # суммы лежат в array('q') как "голые" 8-байтовые числа без упаковки в объекты
+        dates = []
+        categories = []
+        amounts = array('q')
+        descriptions = []
         try:
-            # Открываем файл для чтения
-            with open(self.data_file, 'r') as file:
-                record = None
-                # Читаем файл построчно
-                for line in file:
-                    line = line.strip()
-                    # Если строка начинается с 'Дата:', начинаем новую запись
-                    if line.startswith('Дата:'):
-                        # Если уже есть текущая запись, добавляем ее в список
-                        if record:
-                            self.records.append(record)
-                        # Создаем новую запись
-                        record = Record(line.split(': ')[1], '', 0, '')
-                    elif line.startswith('Категория:'):
-                        # Устанавливаем категорию записи
-                        record.category = line.split(': ')[1]
-                    elif line.startswith('Сумма:'):
-                        # Устанавливаем сумму записи
-                        record.amount = float(line.split(': ')[1])
-                    elif line.startswith('Описание:'):
-                        # Устанавливаем описание записи
-                        record.description = line.split(': ')[1]
-                # Добавляем последнюю запись в список, если она существует
-                if record:
-                    self.records.append(record)
-        except FileNotFoundError:
-            # Если файл не найден, просто продолжаем, считая, что нет данных для загрузки
-            pass
-
-    def save_data(self):
-        """
-        Сохраняет данные в текстовый файл в соответствии с форматом.
-        """
-        with open(self.data_file, 'w') as file:
-            # Сохраняем каждую запись из списка в файл
-            for record in self.records:
-                file.write(f'Дата: {record.date}\n')
-                file.write(f'Категория: {record.category}\n')
-                file.write(f'Сумма: {record.amount}\n')
-                file.write(f'Описание: {record.description}\n')
-                # Добавляем пустую строку между записями для разделения
-                file.write('\n')
+            # Отображаем файл в память: данные приходят напрямую из страничного
+            # кэша ОС, без копирования всего файла в одну большую строку
+            with open(legacy_file, 'rb') as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # Файл не найден или пуст - переносить нечего; отметка не дает
+            # перечитывать файл, который может появиться позже
+            self.conn.execute('PRAGMA user_version = 1')
+            self.conn.commit()
+            return
+        # Записи в файле разделены пустой строкой, а порядок полей внутри
+        # блока фиксирован, поэтому вместо проверок startswith на каждой
+        # строке достаточно срезов с известной длиной префикса. Границы
+        # блоков ищем по байтам (учитывая и Windows-переносы \r\n),
+        # а декодируем каждый блок ровно один раз
+        separator = re.compile(rb'\r?\n\r?\n')
+        with mapped:
+            size = mapped.size()
+            pos = 0
+            while pos < size:
+                match = separator.search(mapped, pos)
+                if match:
+                    end, next_pos = match.start(), match.end()
+                else:
+                    end = next_pos = size
+                block = mapped[pos:end].decode('utf-8')
+                pos = next_pos
+                # splitlines понимает оба вида переносов, поэтому поля
+                # не получают хвостовой \r из Windows-файлов
+                lines = block.splitlines()
+                # Пропускаем пустые или неполные блоки (например, хвост файла)
+                if len(lines) < 4:
+                    continue
+                dates.append(lines[0][6:])           # после 'Дата: '
+                categories.append(CAT_ENC[lines[1][11:]])  # после 'Категория: '
+                # Сумма в старом файле записана в рублях - переводим в копейки
+                amounts.append(round(float(lines[2][7:]) * 100))  # после 'Сумма: '
+                descriptions.append(lines[3][10:])   # после 'Описание: '
+        # Вставляем перенесенные записи и отметку о переносе одной транзакцией
+        self._cursor.executemany(
+            'INSERT INTO records(date, category, amount, description) VALUES(?, ?, ?, ?)',
+            zip(dates, categories, amounts, descriptions)
+        )
+        self.conn.execute('PRAGMA user_version = 1')
+        self.conn.commit()
 
     def add_record(self, date, category, amount, description):
         """
         Добавляет новую запись о доходе или расходе.
         """
-        # Создаем новую запись и добавляем ее в список
-        record = Record(date, category, amount, description)
-        self.records.append(record)
-        # Сохраняем данные в файл
-        self.save_data()
+        # Кодируем категорию и переводим сумму в копейки один раз при записи
+        cat_id = CAT_ENC[category]
+        kopecks = round(amount * 100)
+        # Вставляем новую запись в базу данных
+        self._cursor.execute(
+            'INSERT INTO records(date, category, amount, description) VALUES(?, ?, ?, ?)',
+            (date, cat_id, kopecks, description)
+        )
+        self.conn.commit()
+        # Учитываем новую запись в кэшированных суммах, если они уже подсчитаны;
+        # иначе она попадет в них при первом ленивом подсчете
+        if self._income is not None:
+            if cat_id == CAT_ENC['Доход']:
+                self._income += kopecks
+            else:
+                self._expense += kopecks
 
-    def edit_record(self, index, date, category, amount, description):
+    def edit_record(self, record_id, date, category, amount, description):
         """
-        Редактирует существующую запись по индексу.
+        Редактирует существующую запись по ее номеру.
         """
-        # Проверяем, что индекс находится в пределах допустимого диапазона
-        if index < 0 or index >= len(self.records):
+        # Получаем старые значения записи, чтобы скорректировать кэшированные суммы
+        old = self._cursor.execute(
+            'SELECT category, amount FROM records WHERE id = ?', (record_id,)
+        ).fetchone()
+        # Проверяем, что запись с таким номером существует
+        if old is None:
             print('Некорректный индекс записи.')
             return
-        # Обновляем запись по указанному индексу
-        self.records[index] = Record(date, category, amount, description)
-        # Сохраняем данные в файл
-        self.save_data()
+        # Кодируем категорию и переводим сумму в копейки один раз при записи
+        cat_id = CAT_ENC[category]
+        kopecks = round(amount * 100)
+        # Обновляем запись с указанным номером
+        self._cursor.execute(
+            'UPDATE records SET date = ?, category = ?, amount = ?, description = ? WHERE id = ?',
+            (date, cat_id, kopecks, description, record_id)
+        )
+        self.conn.commit()
+        # Вычитаем старый вклад записи и добавляем новый, если кэш уже подсчитан
+        if self._income is not None:
+            old_cat_id, old_amount = old
+            if old_cat_id == CAT_ENC['Доход']:
+                self._income -= old_amount
+            else:
+                self._expense -= old_amount
+            if cat_id == CAT_ENC['Доход']:
+                self._income += kopecks
+            else:
+                self._expense += kopecks
 
-    def delete_record(self, index):
+    def delete_record(self, record_id):
         """
-        Удаляет запись по индексу.
+        Удаляет запись по ее номеру.
         """
-        # Проверяем, что индекс находится в пределах допустимого диапазона
-        if index < 0 or index >= len(self.records):
+        # Получаем значения записи, чтобы скорректировать кэшированные суммы
+        old = self._cursor.execute(
+            'SELECT category, amount FROM records WHERE id = ?', (record_id,)
+        ).fetchone()
+        # Проверяем, что запись с таким номером существует
+        if old is None:
             print('Некорректный индекс записи.')
             return
-        # Удаляем запись по индексу
-        del self.records[index]
-        # Сохраняем данные в файл
-        self.save_data()
+        # Удаляем запись с указанным номером
+        self._cursor.execute('DELETE FROM records WHERE id = ?', (record_id,))
+        self.conn.commit()
+        # Вычитаем вклад удаленной записи, если кэш уже подсчитан
+        if self._income is not None:
+            old_cat_id, old_amount = old
+            if old_cat_id == CAT_ENC['Доход']:
+                self._income -= old_amount
+            else:
+                self._expense -= old_amount
 
     def search_records(self, query):
         """
         Ищет записи по категории, дате, сумме или описанию.
+        Запрос специализируется по своей форме: число сравнивается только с суммой,
+        строка вида даты ищется только в дате, иначе проверяются все поля.
         """
-        # Перебираем все записи
-        for i, record in enumerate(self.records):
-            # Если запрос содержится в какой-либо части записи, выводим ее
-            if query in record.date or query in record.category or str(record.amount) == query:
-                print(f'{i}: Дата: {record.date}, Категория: {record.category}, Сумма: {record.amount}, Описание: {record.description}')
+        if (query.isascii() and query.replace('.', '', 1).isdigit()
+                and float(query) * 100 <= MAX_KOPECKS):
+            # Числовой запрос: достаточно сравнить сумму (в копейках).
+            # isascii отсекает юникодные "цифры", которые float не принимает,
+            # а проверка предела - суммы, не помещающиеся в целое SQLite;
+            # такие запросы уходят в общую ветку и просто ничего не находят
+            cursor = self._cursor.execute(
+                'SELECT id, date, category, amount, description FROM records '
+                'WHERE amount = ?',
+                (round(float(query) * 100),)
+            )
+        elif query in CAT_ENC:
+            # Запрос-категория: выбираем записи нужной категории по индексу,
+            # не просматривая остальные
+            cursor = self._cursor.execute(
+                'SELECT id, date, category, amount, description FROM records '
+                'WHERE category = ?',
+                (CAT_ENC[query],)
+            )
+        elif re.match(r'\d{4}-', query):
+            # Запрос вида даты: достаточно искать в дате
+            cursor = self._cursor.execute(
+                'SELECT id, date, category, amount, description FROM records '
+                'WHERE instr(date, ?) > 0',
+                (query,)
+            )
+        else:
+            # Общий случай: текстовые поля записи склеиваются в одну строку через
+            # разделитель char(31), и поиск выполняется одной проверкой подстроки.
+            # Категория хранится числом, поэтому подстрочное совпадение с ее
+            # названием ('Дох', 'ход' и т.п.) проверяется заранее по CAT_ENC,
+            # и подошедшие коды добавляются в запрос
+            cat_ids = [cat_id for name, cat_id in CAT_ENC.items() if query in name]
+            sql = ('SELECT id, date, category, amount, description FROM records '
+                   'WHERE instr(date || char(31) || description, ?) > 0')
+            if cat_ids:
+                sql += f" OR category IN ({', '.join('?' * len(cat_ids))})"
+            cursor = self._cursor.execute(sql, (query, *cat_ids))
+        # Выводим все найденные записи, раскодируя категорию и сумму для отображения
+        for record_id, date, cat_id, kopecks, description in cursor:
+            print(f'{record_id}: Дата: {date}, Категория: {CAT_DEC[cat_id]}, Сумма: {format_amount(kopecks)}, Описание: {description}')
 
     def show_balance(self):
         """
         Показывает текущий баланс, общий доход и общий расход.
         """
-        # Суммируем доходы и расходы
-        income = sum(record.amount for record in self.records if record.category == 'Доход')
-        expense = sum(record.amount for record in self.records if record.category == 'Расход')
+        # Берем кэшированные суммы, подсчитывая их при первом обращении
+        self._ensure_totals()
+        income = self._income
+        expense = self._expense
         # Вычисляем баланс
         balance = income - expense
-        # Выводим баланс, общий доход и общий расход
-        print(f'Текущий баланс: {balance}')
-        print(f'Общий доход: {income}')
-        print(f'Общий расход: {expense}')
+        # Выводим баланс, общий доход и общий расход в рублях
+        print(f'Текущий баланс: {format_amount(balance)}')
+        print(f'Общий доход: {format_amount(income)}')
+        print(f'Общий расход: {format_amount(expense)}')
+
+    def close(self):
+        """
+        Закрывает соединение с базой данных.
+        """
+        self.conn.close()
 
-    def is_valid_date(self, date_string):
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def is_valid_date(date_string):
         """
         Проверяет, является ли строка корректной датой в формате "гггг-мм-дд".
+        Результат кэшируется, чтобы повторные проверки одной строки были мгновенными.
         """
+        # Быстрая проверка формы строки без разбора формата
+        if (len(date_string) != 10 or date_string[4] != '-' or date_string[7] != '-'
+                or not (date_string[:4] + date_string[5:7] + date_string[8:]).isdigit()):
+            return False
         try:
-            # Пытаемся преобразовать строку в дату
-            parsed_date = datetime.strptime(date_string, "%Y-%m-%d")
+            # Пытаемся собрать дату из уже проверенных числовых частей
+            datetime(int(date_string[:4]), int(date_string[5:7]), int(date_string[8:]))
             return True
         except ValueError:
-            # Если преобразование не удалось, возвращаем False
+            # Если дата не существует (например, 13-й месяц), возвращаем False
             return False
 
+def read_date(prompt):
+    """
+    Запрашивает у пользователя дату, пока не будет введена корректная.
+    """
+    while True:
+        date = input(prompt)
+        if FinanceTracker.is_valid_date(date):
+            return date
+
+def read_category(prompt):
+    """
+    Запрашивает у пользователя категорию, пока не будет введена корректная.
+    """
+    while True:
+        category = input(prompt)
+        # Одна проверка принадлежности вместо цепочки сравнений
+        if category in CAT_ENC:
+            return category
+
+def read_amount(prompt):
+    """
+    Запрашивает у пользователя сумму, пока не будет введено неотрицательное число.
+    """
+    while True:
+        try:
+            amount = float(input(prompt))
+        except ValueError:
+            # Нечисловой ввод больше не завершает программу с ошибкой
+            continue
+        # Отсекаем inf/nan и суммы, которые в копейках не помещаются
+        # в целое SQLite, - такой ввод переспрашивается, а не роняет запись
+        if (math.isfinite(amount) and amount >= 0
+                and round(amount * 100) <= MAX_KOPECKS):
+            return amount
+
 def main():
-    # Указываем путь к файлу данных
-    data_file = 'data.txt'
+    # Указываем путь к файлу базы данных
+    data_file = 'data.db'
     # Создаем объект FinanceTracker для управления записями
-    tracker = FinanceTracker(data_file)
+    # Записи из старого текстового файла data.txt переносятся автоматически
+    tracker = FinanceTracker(data_file, legacy_file='data.txt')
 
     while True:
         # Выводим меню
@@ -164,20 +397,9 @@ def main():
 
         # Добавление новой записи
         if choice == '1':
-            date = input('Введите дату (гггг-мм-дд): ')
-            # Проверка корректности введенной даты
-            while tracker.is_valid_date(date) == False:
-                date = input('Введите дату (гггг-мм-дд): ')
-            # Ввод категории
-            category = input('Введите категорию (Доход/Расход): ')
-            # Проверка корректности введенной категории
-            while category != 'Доход' and category != 'Расход':
-                category = input('Введите категорию (Доход/Расход): ')
-            # Ввод суммы и проверка, что сумма не отрицательна
-            amount = float(input('Введите сумму: '))
-            while amount < 0:
-                amount = float(input('Введите сумму: '))
-            # Ввод описания
+            date = read_date('Введите дату (гггг-мм-дд): ')
+            category = read_category('Введите категорию (Доход/Расход): ')
+            amount = read_amount('Введите сумму: ')
             description = input('Введите описание: ')
             # Добавляем новую запись
             tracker.add_record(date, category, amount, description)
@@ -185,18 +407,9 @@ def main():
         # Редактирование существующей записи
         elif choice == '2':
             index = int(input('Введите индекс записи для редактирования: '))
-            date = input('Введите новую дату (гггг-мм-дд): ')
-            # Проверка корректности введенной даты
-            while tracker.is_valid_date(date) == False:
-                date = input('Введите дату (гггг-мм-дд): ')
-            category = input('Введите новую категорию (Доход/Расход): ')
-            # Проверка корректности введенной категории
-            while category != 'Доход' and category != 'Расход':
-                category = input('Введите категорию (Доход/Расход): ')
-            # Ввод новой суммы и проверка, что сумма не отрицательна
-            amount = float(input('Введите новую сумму: '))
-            while amount < 0:
-                amount = float(input('Введите сумму: '))
+            date = read_date('Введите новую дату (гггг-мм-дд): ')
+            category = read_category('Введите новую категорию (Доход/Расход): ')
+            amount = read_amount('Введите новую сумму: ')
             description = input('Введите новое описание: ')
             # Редактируем запись
             tracker.edit_record(index, date, category, amount, description)
@@ -220,6 +433,8 @@ def main():
 
         # Выход из программы
         elif choice == '6':
+            # Закрываем базу данных перед выходом
+            tracker.close()
             break
         else:
             print('Некорректный выбор, попробуйте снова.')